@@ -0,0 +1,57 @@
+"""
+Module for persisting results between runs.
+
+Lookups that are stable over time (e.g. a channel's ID and upload playlist)
+are stored on disk so that re-runs can skip the network entirely.
+"""
+
+import functools
+import inspect
+import os
+import diskcache
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "wts")
+CHANNEL_CACHE_TTL = 30 * 24 * 60 * 60  # 30 days, in seconds
+PAGE_CACHE_TTL = 7 * 24 * 60 * 60  # 7 days, in seconds
+
+channels = diskcache.Cache(os.path.join(CACHE_DIR, "channels"))
+# Transcripts never change for a given video ID, so they are stored without expiry.
+transcripts = diskcache.Cache(os.path.join(CACHE_DIR, "transcripts"))
+# Paginated API responses, stored as (etag, data) for conditional requests.
+pages = diskcache.Cache(os.path.join(CACHE_DIR, "pages"))
+
+_MISSING = object()
+
+
+def cached(cache: diskcache.Cache, expire: int | None = None):
+    """
+    Cache the result of a single-argument function (sync or async) in
+    `cache`, keyed by the function name and its argument.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(key):
+                cache_key = (func.__name__, key)
+                value = cache.get(cache_key, default=_MISSING)
+                if value is _MISSING:
+                    value = await func(key)
+                    cache.set(cache_key, value, expire=expire)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(key):
+            cache_key = (func.__name__, key)
+            value = cache.get(cache_key, default=_MISSING)
+            if value is _MISSING:
+                value = func(key)
+                cache.set(cache_key, value, expire=expire)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -1,10 +1,17 @@
+import asyncio
 import wts.youtube.videos as videos
 import wts.youtube.transcripts as transcripts
 
+async def _run(channel_url: str):
+    try:
+        vid_list = await videos.get_video_ids(channel_url)
+        await transcripts.get_transcript(vid_list)
+    finally:
+        await videos.close_session()
+
 def main():
     channel_url = "https://www.youtube.com/@ryanthreethousand"
-    vid_list = videos.get_video_ids(channel_url)
-    transcripts.get_transcript(vid_list)
+    asyncio.run(_run(channel_url))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Module for retrieving transcripts of YouTube videos.
+
+This module fetches the English transcripts for a list of video ID's
+and returns them keyed by video ID for searching.
+"""
+
+import asyncio
+import src.wts._cache as _cache
+from youtube_transcript_api import (
+    AgeRestricted,
+    FetchedTranscript,
+    InvalidVideoId,
+    NoTranscriptFound,
+    TranscriptsDisabled,
+    VideoUnavailable,
+    VideoUnplayable,
+    YouTubeTranscriptApi,
+)
+
+TRANSCRIPT_LANGUAGES = ["en"]
+MAX_CONCURRENT_FETCHES = 8
+
+# Errors that only mean this one video has no usable transcript. Anything else
+# (e.g. the client being blocked or rate limited) affects every fetch and is raised.
+SKIPPABLE_ERRORS = (
+    NoTranscriptFound,
+    TranscriptsDisabled,
+    VideoUnavailable,
+    VideoUnplayable,
+    AgeRestricted,
+    InvalidVideoId,
+)
+
+ytt_api = YouTubeTranscriptApi()
+
+
+async def _fetch_one(sem: asyncio.BoundedSemaphore, video_id: str) -> FetchedTranscript:
+    # youtube_transcript_api is synchronous, so each fetch is offloaded to the
+    # default thread pool and the semaphore caps how many are in flight at once.
+    async with sem:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, ytt_api.fetch, video_id, TRANSCRIPT_LANGUAGES
+        )
+
+
+async def get_transcript(video_ids: list[str]) -> dict[str, FetchedTranscript]:
+    """
+    Retrieve the English transcripts for the given video ID's concurrently
+    and return them as a dict keyed by video ID.
+    """
+    transcripts = {}
+    to_fetch = []
+    # Parsed transcripts from previous runs are served from disk and never become tasks.
+    for video_id in video_ids:
+        transcript = _cache.transcripts.get(video_id)
+        if transcript is None:
+            to_fetch.append(video_id)
+        else:
+            transcripts[video_id] = transcript
+
+    sem = asyncio.BoundedSemaphore(MAX_CONCURRENT_FETCHES)
+    tasks = [_fetch_one(sem, video_id) for video_id in to_fetch]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    error = None
+    for video_id, result in zip(to_fetch, results):
+        # Videos without a usable English transcript are skipped. Any other error is
+        # raised, but only after every successful fetch has been stored in the cache.
+        if isinstance(result, SKIPPABLE_ERRORS):
+            continue
+        if isinstance(result, BaseException):
+            error = error or result
+            continue
+        _cache.transcripts[video_id] = result
+        transcripts[video_id] = result
+
+    if error is not None:
+        raise error
+    return transcripts
+
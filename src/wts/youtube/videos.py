@@ -8,8 +8,17 @@ returns video ID's required for transcript extraction.
 from dotenv import load_dotenv
 import os
 import src.wts.exceptions as exceptions
-import requests
-import subprocess
+import src.wts._cache as _cache
+import aiohttp
+import asyncio
+import orjson
+import re
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 
 load_dotenv()
 
@@ -18,87 +27,245 @@ api_key = os.getenv("API_KEY")
 CHANNEL_ID_FETCH_TIMEOUT = 15
 YOUTUBE_API_TIMEOUT = 5
 MAX_RESULTS_PER_PAGE = 50  # The API only supports a maximum of 50
+# Partial response: only ask for the fields that are actually read from each page.
+PLAYLIST_ITEMS_FIELDS = "etag,nextPageToken,items/contentDetails/videoId"
+MAX_IDS_PER_VIDEOS_REQUEST = 50  # videos.list accepts at most 50 comma separated ID's
 
+# Transient failures (dropped connections, timeouts, rate limiting) are retried
+# with jittered exponential back-off instead of aborting the whole walk.
+API_MAX_ATTEMPTS = 5
+API_RETRY_INITIAL_WAIT = 1
+API_RETRY_MAX_WAIT = 30
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# The Data API reports short-term throttling as a 403 with one of these reasons.
+# A 403 for any other reason (e.g. "quotaExceeded" for the daily quota) is final.
+RETRYABLE_403_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
 
-def get_channel_id(url: str) -> str:
+# At most API_MAX_QPS requests are started in any API_RATE_PERIOD second window
+# (the Data API default quota is 10 queries per second).
+API_MAX_QPS = 10
+API_RATE_PERIOD = 1
+
+# A bare "channelId" can belong to any embedded channel, so only the page's own ID
+# is matched: its canonical /channel/UC... link, or the "externalId" in its metadata.
+CHANNEL_ID_PATTERNS = (
+    re.compile(r'<link rel="canonical" href="https://www\.youtube\.com/channel/(UC[\w-]{22})"'),
+    re.compile(r'"externalId":"(UC[\w-]{22})"'),
+)
+
+class NotModified:
+    """
+    Type of the NOT_MODIFIED sentinel returned by yt_api_req.
+    """
+
+
+# Returned by yt_api_req when the resource still matches the ETag it was given.
+NOT_MODIFIED = NotModified()
+
+MAX_CONNECTIONS = 64
+MAX_CONNECTIONS_PER_HOST = 8
+
+# Every API call goes to the same host, so a shared session keeps the
+# connection (and its TLS session) alive across requests. It is created lazily
+# because an aiohttp session is bound to the running event loop, and a new one
+# is created whenever that loop changes.
+_session: aiohttp.ClientSession | None = None
+_session_loop: asyncio.AbstractEventLoop | None = None
+
+# The rate limiter is bound to the loop it was created in, and its releases are
+# scheduled on that loop, so a fresh one is created for every new event loop.
+_rate_sem: asyncio.Semaphore | None = None
+_rate_sem_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    # A session left open by a previous loop cannot be closed from this one, since
+    # its connections belong to the old loop, so it is simply replaced.
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS, limit_per_host=MAX_CONNECTIONS_PER_HOST
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+        _session_loop = loop
+    return _session
+
+
+def _get_rate_sem() -> asyncio.Semaphore:
+    global _rate_sem, _rate_sem_loop
+    loop = asyncio.get_running_loop()
+    if _rate_sem is None or _rate_sem_loop is not loop:
+        _rate_sem = asyncio.Semaphore(API_MAX_QPS)
+        _rate_sem_loop = loop
+    return _rate_sem
+
+
+async def close_session() -> None:
+    """
+    Close the shared HTTP session and release its pooled connections.
+    """
+    if _session is not None and _session_loop is asyncio.get_running_loop():
+        await _session.close()
+
+
+@_cache.cached(_cache.channels, expire=_cache.CHANNEL_CACHE_TTL)
+async def get_channel_id(url: str) -> str:
     """
     Retrieve the channel ID from a YouTube channel URL.
     """
     try:
-        result = subprocess.run(
-            [
-                "yt-dlp",
-                "--print",
-                "filename",
-                "-o",
-                "%(channel_id)s",
-                "--skip-download",
-                "--playlist-items",
-                "1",
-                "--no-warnings",
-                url,
-            ],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=CHANNEL_ID_FETCH_TIMEOUT,
-        )
-        return result.stdout.strip()
+        async with _get_session().get(
+            url,
+            timeout=aiohttp.ClientTimeout(total=CHANNEL_ID_FETCH_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            html = await response.text()
 
-    except subprocess.CalledProcessError as e:
-        err = e.stderr if e.stderr else "unknown error"
+    except asyncio.TimeoutError as e:
+        raise exceptions.ChannelFetchError(
+            f"Timed out while fetching channel ID for the URL: {url}"
+        ) from e
+
+    except aiohttp.ClientError as e:
         msg = (
             f"Failed to fetch channel ID for the URL: {url}.\n"
-            f"Check below for the error.\n{err}"
+            f"Check below for the error.\n{str(e)}"
         )
         raise exceptions.ChannelFetchError(msg) from e
 
-    except subprocess.TimeoutExpired as e:
-        raise exceptions.ChannelFetchError(
-            f"Timed out while fetching channel ID for the URL: {url}"
-        ) from e
+    for pattern in CHANNEL_ID_PATTERNS:
+        match = pattern.search(html)
+        if match is not None:
+            return match.group(1)
+    raise exceptions.ChannelFetchError(
+        f"Failed to fetch channel ID for the URL: {url}.\n"
+        "No channel ID found in the page."
+    )
+
+
+class _APIResponseError(Exception):
+    """
+    Raised by _api_get for an error response, carrying what the retry policy needs.
+    """
 
+    def __init__(self, status: int, reason: str | None, retry_after: int | None):
+        super().__init__(status, reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
 
-def yt_api_req(type: str, params: dict) -> dict:
+
+def _error_reason(body: bytes) -> str | None:
+    # Error bodies look like {"error": {"errors": [{"reason": "..."}], ...}}.
     try:
-        response = requests.get(
-            url=f"https://youtube.googleapis.com/youtube/v3/{type}",
-            params=params,
-            timeout=YOUTUBE_API_TIMEOUT,
+        return orjson.loads(body)["error"]["errors"][0]["reason"]
+    except (orjson.JSONDecodeError, KeyError, IndexError, TypeError):
+        return None
+
+
+def _is_transient(e: BaseException) -> bool:
+    if isinstance(e, _APIResponseError):
+        if e.status == 403:
+            return e.reason in RETRYABLE_403_REASONS
+        return e.status in RETRYABLE_STATUS_CODES
+    return isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+_backoff = wait_exponential_jitter(initial=API_RETRY_INITIAL_WAIT, max=API_RETRY_MAX_WAIT)
+
+
+def _retry_wait(retry_state) -> float:
+    # Honour the server's Retry-After when it sends one, otherwise back off exponentially.
+    e = retry_state.outcome.exception()
+    if isinstance(e, _APIResponseError) and e.retry_after is not None:
+        return e.retry_after
+    return _backoff(retry_state)
+
+
+@retry(
+    stop=stop_after_attempt(API_MAX_ATTEMPTS),
+    wait=_retry_wait,
+    retry=retry_if_exception(_is_transient),
+    reraise=True,
+)
+async def _api_get(url: str, params: dict, headers: dict | None) -> tuple[int, bytes]:
+    # Each slot is handed back a full period after the request starts, rather than
+    # when it finishes, so bursts from asyncio.gather are spread out to the quota.
+    rate_sem = _get_rate_sem()
+    await rate_sem.acquire()
+    asyncio.get_running_loop().call_later(API_RATE_PERIOD, rate_sem.release)
+    async with _get_session().get(
+        url=url,
+        params=params,
+        headers=headers,
+        timeout=aiohttp.ClientTimeout(total=YOUTUBE_API_TIMEOUT),
+    ) as response:
+        body = await response.read()
+        if response.status >= 400:
+            retry_after = response.headers.get("Retry-After", "")
+            raise _APIResponseError(
+                response.status,
+                _error_reason(body),
+                int(retry_after) if retry_after.isdigit() else None,
+            )
+        return response.status, body
+
+
+async def yt_api_req(
+    type: str, params: dict, etag: str | None = None
+) -> dict | NotModified:
+    if not api_key:
+        raise exceptions.YouTubeAPIError(
+            "No YouTube API key found. Set API_KEY in the environment or a .env file."
+        )
+    # Unlike requests, aiohttp rejects None values, so unset params are dropped.
+    params = {key: value for key, value in params.items() if value is not None}
+    # With an ETag, YouTube answers 304 without a body if the resource is unchanged.
+    headers = {"If-None-Match": etag} if etag else None
+    try:
+        status, body = await _api_get(
+            f"https://youtube.googleapis.com/youtube/v3/{type}", params, headers
         )
-        response.raise_for_status()
-        try:
-            data = response.json()
-            return data
-        except ValueError as e:
-            msg = f"Invalid data received:\n {response.text}"
-            raise exceptions.YouTubeAPIError(msg) from e
 
-    except requests.ConnectionError as e:
-        msg = f"Failed to connect to the API. Check details below:\n{str(e)}"
+    # aiohttp's socket timeouts are also connection errors, so timeouts are handled first.
+    except asyncio.TimeoutError as e:
+        msg = "YouTubeAPI took too long to respond"
         raise exceptions.YouTubeAPIError(msg) from e
-    except requests.HTTPError as e:
-        status_code = e.response.status_code
+    except _APIResponseError as e:
+        status_code = e.status
         msg = f"received bad response code from YouTubeAPI:{status_code}"
+        if e.reason:
+            msg += f" ({e.reason})"
         raise exceptions.YouTubeAPIError(msg) from e
-    except requests.Timeout as e:
-        msg = "YouTubeAPI took too long to respond"
+    except aiohttp.ClientConnectionError as e:
+        msg = f"Failed to connect to the API. Check details below:\n{str(e)}"
         raise exceptions.YouTubeAPIError(msg) from e
 
+    if status == 304:
+        return NOT_MODIFIED
+    try:
+        data = orjson.loads(body)
+        return data
+    except orjson.JSONDecodeError as e:
+        msg = f"Invalid data received:\n {body.decode(errors='replace')}"
+        raise exceptions.YouTubeAPIError(msg) from e
 
-def get_upload_playlist_id(channel_id: str) -> str:
+
+@_cache.cached(_cache.channels, expire=_cache.CHANNEL_CACHE_TTL)
+async def get_upload_playlist_id(channel_id: str) -> str:
     """
     Retrieve the upload playlist ID for a given channel ID.
     """
+    params = {
+        "part": "contentDetails",
+        "maxResults": MAX_RESULTS_PER_PAGE,
+        "id": channel_id,
+        "key": api_key,
+    }
+
+    data = await yt_api_req("playlists", params)
     try:
-        params = {
-            "part": "contentDetails",
-            "maxResults": MAX_RESULTS_PER_PAGE,
-            "id": channel_id,
-            "key": api_key,
-        }
-
-        data = yt_api_req("playlists", params)
         playlist_id = data["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
     except (KeyError, TypeError) as e:
         msg = f"Invalid data received:\n {data}"
@@ -107,39 +274,84 @@ def get_upload_playlist_id(channel_id: str) -> str:
     return playlist_id
 
 
-def get_video_ids(channel_url: str) -> list[str]:
+async def get_video_ids(channel_url: str) -> list[str]:
     """
     Retrieve video ID's from a YouTube channel URL and return them as a list.
     """
-    id = get_channel_id(channel_url)
-    playlist_id = get_upload_playlist_id(id)
+    id = await get_channel_id(channel_url)
+    playlist_id = await get_upload_playlist_id(id)
     video_ids = []
     next_page_token = None
     # YouTube paginates the results with a max of only 50 items per page.
     # The result also consists of a token to access previous or/and next pages (if any)
     # which can be used to send requests to get subsequent pages.
     # If there is no previous page or next page, the respective fields will not be present in the JSON.
+    # Since each token is only known once the previous page arrives, pages cannot be fetched
+    # concurrently; instead each page is trimmed down to the video ID's and the next token.
+    # Pages from previous runs are revalidated with their ETag and reused when unchanged.
+    params = {
+        "part": "contentDetails",
+        "maxResults": MAX_RESULTS_PER_PAGE,
+        "playlistId": playlist_id,
+        "fields": PLAYLIST_ITEMS_FIELDS,
+        "key": api_key,
+    }
     while True:
-        params = {
-            "part": "contentDetails",
-            "maxResults": MAX_RESULTS_PER_PAGE,
-            "playlistId": playlist_id,
-            "key": api_key,
-        }
-
+        # Only the page token changes between requests, so the same params are reused.
         if next_page_token:
             params["pageToken"] = next_page_token
+        cache_key = (playlist_id, next_page_token)
         next_page_token = None
+        cached_page = _cache.pages.get(cache_key)
+        etag = cached_page[0] if cached_page else None
+        data = await yt_api_req("playlistItems", params, etag=etag)
+        not_modified = data is NOT_MODIFIED
+        if not_modified:
+            data = cached_page[1]
         try:
-            data = yt_api_req("playlistItems", params)
-            for playlist_item in data["items"]:
-                video_ids.append(playlist_item["contentDetails"]["videoId"])
+            page_ids = [item["contentDetails"]["videoId"] for item in data["items"]]
             if "nextPageToken" in data:
                 next_page_token = data["nextPageToken"]
         except (KeyError, TypeError) as e:
             msg = f"Invalid data received:\n {data}"
             raise exceptions.YouTubeAPIError(msg) from e
 
+        # Only pages that parsed cleanly are cached, so a 304 never revives a bad body.
+        if not not_modified:
+            _cache.pages.set(
+                cache_key, (data.get("etag"), data), expire=_cache.PAGE_CACHE_TTL
+            )
+        video_ids.extend(page_ids)
+
         if next_page_token is None:
             break
     return video_ids
+
+
+async def _get_video_metadata_batch(video_ids: list[str]) -> dict[str, dict]:
+    params = {
+        "part": "snippet,contentDetails",
+        "id": ",".join(video_ids),
+        "key": api_key,
+    }
+    data = await yt_api_req("videos", params)
+    try:
+        return {item["id"]: item for item in data["items"]}
+    except (KeyError, TypeError) as e:
+        msg = f"Invalid data received:\n {data}"
+        raise exceptions.YouTubeAPIError(msg) from e
+
+
+async def get_video_metadata(video_ids: list[str]) -> dict[str, dict]:
+    """
+    Retrieve the snippet and content details for the given video ID's and
+    return them as a dict keyed by video ID.
+    """
+    # One videos.list request covers up to 50 videos, so the ID's are sent in
+    # batches and the batches are fetched concurrently.
+    batches = [
+        video_ids[i : i + MAX_IDS_PER_VIDEOS_REQUEST]
+        for i in range(0, len(video_ids), MAX_IDS_PER_VIDEOS_REQUEST)
+    ]
+    results = await asyncio.gather(*(_get_video_metadata_batch(b) for b in batches))
+    return {video_id: item for batch in results for video_id, item in batch.items()}